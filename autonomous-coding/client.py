@@ -5,18 +5,18 @@ Claude SDK Client Configuration
 Functions for creating and configuring the Claude Agent SDK client.
 """
 
+import functools
 import json
 import os
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from claude_code_sdk import ClaudeCodeOptions, ClaudeSDKClient
-from claude_code_sdk.types import HookMatcher
+if TYPE_CHECKING:
+    from claude_code_sdk import ClaudeSDKClient
 
-from security import bash_security_hook
 
-
-# Puppeteer MCP tools for browser automation
-PUPPETEER_TOOLS = [
+# Puppeteer MCP tools for browser automation (tuples: these are read-only)
+PUPPETEER_TOOLS = (
     "mcp__puppeteer__puppeteer_navigate",
     "mcp__puppeteer__puppeteer_screenshot",
     "mcp__puppeteer__puppeteer_click",
@@ -24,10 +24,10 @@ PUPPETEER_TOOLS = [
     "mcp__puppeteer__puppeteer_select",
     "mcp__puppeteer__puppeteer_hover",
     "mcp__puppeteer__puppeteer_evaluate",
-]
+)
 
 # Built-in tools
-BUILTIN_TOOLS = [
+BUILTIN_TOOLS = (
     "Read",
     "Write",
     "Edit",
@@ -39,15 +39,62 @@ BUILTIN_TOOLS = [
     "WebSearch",
     "NotebookEdit",
     "TodoWrite",
-]
+)
+
+# Full tool allowlist, merged once at import time
+ALL_TOOLS = [*BUILTIN_TOOLS, *PUPPETEER_TOOLS]
+
+# Home directory, resolved once at import. Kept as a plain string: the CLI
+# path handling below only ever needs string forms (for os.environ["PATH"]
+# and existence checks), and string joins skip pathlib's parsing overhead.
+_HOME = os.path.expanduser("~")
+
+# Security settings - bypass all permission checks
+# Using bypassPermissions mode allows ALL tools including any MCP tools
+# without needing to list them explicitly. Both sandbox variants are static,
+# so their JSON encodings are built once at import time.
+_SECURITY_SETTINGS_JSON = {
+    sandbox: json.dumps({"sandbox": {"enabled": sandbox}}, indent=2).encode()
+    for sandbox in (False, True)
+}
+
+# MCP server configuration, static across calls
+_MCP_SERVERS = {"puppeteer": {"command": "npx", "args": ["puppeteer-mcp-server"]}}
+
+# The SDK and security hook are imported lazily on first create_client call,
+# so importing this module (e.g., just for get_api_key) doesn't pay their
+# import cost
+_sdk_symbols = None
+
+
+def _load_sdk():
+    """Import the SDK once, caching the client classes and hook config."""
+    global _sdk_symbols
+    if _sdk_symbols is None:
+        from claude_code_sdk import ClaudeCodeOptions, ClaudeSDKClient
+        from claude_code_sdk.types import HookMatcher
+
+        from security import bash_security_hook
+
+        # The hook wiring is static too; build it here (rather than at module
+        # scope) only because HookMatcher is part of the lazy import
+        hooks = {
+            "PreToolUse": [
+                HookMatcher(matcher="Bash", hooks=[bash_security_hook]),
+            ],
+        }
+        _sdk_symbols = (ClaudeCodeOptions, ClaudeSDKClient, hooks)
+    return _sdk_symbols
 
 
+@functools.lru_cache(maxsize=1)
 def get_api_key() -> str:
     """
     Get the API key from environment variables.
 
     Checks for ANTHROPIC_API_KEY first, then falls back to CLAUDE_CODE_OAUTH_TOKEN.
-    Both work with the Claude API.
+    Both work with the Claude API. The result is cached, so repeated calls
+    don't re-read the environment.
 
     Returns:
         The API key string
@@ -67,6 +114,12 @@ def get_api_key() -> str:
     return api_key
 
 
+# Tracks whether the PATH mutation in setup_cli_path has run, so it happens
+# at most once per process even if the lru_cache is cleared
+_cli_setup_done = False
+
+
+@functools.lru_cache(maxsize=1)
 def setup_cli_path() -> str | None:
     """
     Ensure Claude CLI is findable by the SDK.
@@ -83,81 +136,123 @@ def setup_cli_path() -> str | None:
 
     Returns:
         Path to Claude CLI if found, None otherwise
+
+    The result is cached, so the directory scan and PATH update run once
+    per process no matter how many clients are created.
     """
+    global _cli_setup_done
+
     import shutil
 
     # Preferred Claude CLI locations (in priority order)
     cli_locations = [
-        Path.home() / ".claude" / "local",  # Local Claude installation (preferred)
-        Path.home() / ".npm-global" / "bin",
-        Path.home() / "node_modules" / ".bin",
+        os.path.join(_HOME, ".claude", "local"),  # Local installation (preferred)
+        os.path.join(_HOME, ".npm-global", "bin"),
+        os.path.join(_HOME, "node_modules", ".bin"),
     ]
 
     # Check CLAUDE_CLI_PATH env var - highest priority
     if cli_path_env := os.environ.get("CLAUDE_CLI_PATH"):
-        cli_dir = Path(cli_path_env).parent
-        cli_locations.insert(0, cli_dir)
+        cli_locations.insert(0, os.path.dirname(cli_path_env))
+
+    # Each candidate lives in its own directory, so probing is one lexists
+    # per location; just drop duplicates (CLAUDE_CLI_PATH may point into one
+    # of the defaults) so no directory is stat'd twice
+    cli_locations = list(dict.fromkeys(cli_locations))
 
     # Add directories containing claude binary to FRONT of PATH
     # This ensures our preferred locations take priority over system installs
     for location in cli_locations:
-        claude_path = location / "claude"
-        if claude_path.exists():
+        claude_path = os.path.join(location, "claude")
+        if os.path.lexists(claude_path):
             # Prepend to PATH so it takes priority
-            current_path = os.environ.get("PATH", "")
-            if str(location) not in current_path:
-                os.environ["PATH"] = f"{location}:{current_path}"
-            return str(claude_path)
-
-    # Fall back to whatever is in PATH
-    if shutil.which("claude"):
-        return shutil.which("claude")
-
-    return None
-
-
-def create_client(project_dir: Path, model: str) -> ClaudeSDKClient:
+            if not _cli_setup_done:
+                # Compare against PATH entries, not the raw string: substring
+                # matching is O(len(PATH)) and can false-positive on prefixes
+                # like /usr/claude vs /usr/claude-cli
+                current_path = os.environ.get("PATH", "")
+                if location not in set(current_path.split(os.pathsep)):
+                    os.environ["PATH"] = f"{location}:{current_path}"
+                _cli_setup_done = True
+            return claude_path
+
+    # Fall back to whatever is in PATH (which() returns None when not found)
+    return shutil.which("claude")
+
+
+def create_client(
+    project_dir: Path, model: str, *, sandbox: bool = False
+) -> "ClaudeSDKClient":
     """
     Create a Claude Agent SDK client with all tools enabled.
 
     Args:
         project_dir: Directory for the project
         model: Claude model to use
+        sandbox: Enable the SDK sandbox. Off by default - this demo runs
+            with full system access.
 
     Returns:
         Configured ClaudeSDKClient
 
-    Note: Security checks disabled - all tools and commands are allowed.
+    Note: Permission checks are bypassed - all tools and commands are allowed.
     """
-    api_key = get_api_key()
-
-    # Security settings - bypass all permission checks
-    # Using bypassPermissions mode allows ALL tools including any MCP tools
-    # without needing to list them explicitly
-    security_settings = {
-        "sandbox": {"enabled": False},
-    }
-
-    # Ensure project directory exists before creating settings file
-    project_dir.mkdir(parents=True, exist_ok=True)
-
-    # Write settings to a file in the project directory
-    settings_file = project_dir / ".claude_settings.json"
-    with open(settings_file, "w") as f:
-        json.dump(security_settings, f, indent=2)
-
-    print(f"Created settings at {settings_file}")
-    print("   - Sandbox disabled (all system access allowed)")
-    print("   - Permission mode: bypassPermissions (all tools auto-approved)")
-    print("   - All MCP tools: auto-approved")
-    print()
+    ClaudeCodeOptions, ClaudeSDKClient, hooks = _load_sdk()
+
+    # Fail fast if no credentials are configured (the SDK reads the env itself,
+    # so the returned key is not passed along)
+    get_api_key()
+
+    # Ensure project directory exists before creating settings file; the cheap
+    # isdir check skips the mkdir syscall on the common already-exists path
+    if not os.path.isdir(project_dir):
+        project_dir.mkdir(parents=True, exist_ok=True)
+
+    # Resolve once; the settings path inherits the resolved prefix, so no
+    # second resolve() (and its readlink/stat walk) is needed
+    resolved_dir = project_dir.resolve()
+
+    # Write settings to a file in the project directory. The JSON is encoded
+    # once at import, written with a single call, and the write is skipped
+    # entirely when the file already has the right contents (create_client
+    # may be called repeatedly for the same project).
+    settings_file = resolved_dir / ".claude_settings.json"
+    settings_bytes = _SECURITY_SETTINGS_JSON[sandbox]
+    if not settings_file.exists() or settings_file.read_bytes() != settings_bytes:
+        # The payload is already fully encoded, so write it through a raw fd
+        # in one os.write instead of stacking TextIOWrapper/BufferedWriter.
+        # Deliberately a single plain write: the file is tiny (~50 bytes), so
+        # async or io_uring wrappers would only add submission overhead. If
+        # the settings ever grow large, switch to a buffered writer with a
+        # buffer at least the payload size - not before.
+        fd = os.open(settings_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, settings_bytes)
+        finally:
+            os.close(fd)
 
     # Ensure Claude CLI is findable (adds to PATH if needed)
     cli_path = setup_cli_path()
     if cli_path:
-        print(f"   - Using Claude CLI at: {cli_path}")
+        cli_status = f"   - Using Claude CLI at: {cli_path}"
     else:
-        print("   - Warning: Claude CLI not found, SDK will attempt to locate it")
+        cli_status = "   - Warning: Claude CLI not found, SDK will attempt to locate it"
+
+    # Compose the status report once and emit it with a single print instead
+    # of taking the stdout lock (and a write) per line
+    sandbox_status = (
+        "   - Sandbox enabled (system access restricted)"
+        if sandbox
+        else "   - Sandbox disabled (all system access allowed)"
+    )
+    print(
+        f"Created settings at {settings_file}\n"
+        f"{sandbox_status}\n"
+        "   - Permission mode: bypassPermissions (all tools auto-approved)\n"
+        "   - All MCP tools: auto-approved\n"
+        "\n"
+        f"{cli_status}"
+    )
 
     return ClaudeSDKClient(
         options=ClaudeCodeOptions(
@@ -166,20 +261,11 @@ def create_client(project_dir: Path, model: str) -> ClaudeSDKClient:
             # bypassPermissions mode: ALL tools are auto-approved including any MCP tools
             # This is equivalent to --dangerously-skip-permissions
             permission_mode="bypassPermissions",
-            allowed_tools=[
-                *BUILTIN_TOOLS,
-                *PUPPETEER_TOOLS,
-            ],
-            mcp_servers={
-                "puppeteer": {"command": "npx", "args": ["puppeteer-mcp-server"]}
-            },
-            hooks={
-                "PreToolUse": [
-                    HookMatcher(matcher="Bash", hooks=[bash_security_hook]),
-                ],
-            },
+            allowed_tools=ALL_TOOLS,
+            mcp_servers=_MCP_SERVERS,
+            hooks=hooks,
             max_turns=1000,
-            cwd=str(project_dir.resolve()),
-            settings=str(settings_file.resolve()),  # Use absolute path
+            cwd=str(resolved_dir),
+            settings=str(settings_file),  # Already absolute
         )
     )